@@ -0,0 +1,116 @@
+import os
+import time
+import atexit
+import shutil
+import logging
+import tempfile
+import threading
+import subprocess
+from typing import Optional
+import requests
+
+logger = logging.getLogger(__name__)
+
+DEBUG_HOST = "127.0.0.1"
+DEBUG_PORT = int(os.getenv("CHROME_DEBUG_PORT", "9222"))
+SHARED_PROFILE_DIR = os.getenv("CHROME_SHARED_PROFILE", os.path.join(tempfile.gettempdir(), "shared-profile"))
+
+_process: Optional[subprocess.Popen] = None
+_lock = threading.Lock()
+
+
+def shared_browser_enabled() -> bool:
+    """Whether bots should attach to one shared Chrome instead of launching their own."""
+    return os.getenv("SHARED_BROWSER", "0") == "1"
+
+
+def debugger_address() -> str:
+    return f"{DEBUG_HOST}:{DEBUG_PORT}"
+
+
+def _find_chrome_binary() -> Optional[str]:
+    binary = os.getenv("CHROME_BINARY")
+    if binary:
+        return binary
+    for name in ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome"):
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+
+def _is_listening(timeout: float = 1.0) -> bool:
+    try:
+        response = requests.get(f"http://{debugger_address()}/json/version", timeout=timeout)
+        return response.status_code == 200
+    except requests.RequestException:
+        return False
+
+
+def ensure_running(startup_timeout: int = 20) -> Optional[str]:
+    """Start the shared Chrome if needed and return its debugger address.
+
+    Returns None if the browser could not be started.
+    """
+    global _process
+
+    with _lock:
+        if _is_listening():
+            return debugger_address()
+
+        binary = _find_chrome_binary()
+        if not binary:
+            logger.error("Chrome binary not found; set CHROME_BINARY")
+            return None
+
+        os.makedirs(SHARED_PROFILE_DIR, exist_ok=True)
+        args = [
+            binary,
+            f"--remote-debugging-port={DEBUG_PORT}",
+            f"--user-data-dir={SHARED_PROFILE_DIR}",
+            "--no-first-run",
+            "--no-default-browser-check",
+            "--disable-blink-features=AutomationControlled",
+            "--disable-gpu",
+            "--disable-dev-shm-usage",
+            "--disable-extensions",
+            "--blink-settings=imagesEnabled=false",
+        ]
+        if os.getenv("HEADLESS", "1") == "1":
+            args.append("--headless=new")
+
+        try:
+            _process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except OSError as e:
+            logger.error(f"Failed to launch shared Chrome: {e}")
+            return None
+
+        deadline = time.time() + startup_timeout
+        while time.time() < deadline:
+            if _process.poll() is not None:
+                logger.error(f"Shared Chrome exited during startup with code {_process.returncode}")
+                return None
+            if _is_listening():
+                logger.info(f"Shared Chrome listening on {debugger_address()}")
+                return debugger_address()
+            time.sleep(0.25)
+
+        logger.error(f"Shared Chrome did not open its debugging port within {startup_timeout} seconds")
+        return None
+
+
+def stop():
+    """Terminate the shared Chrome if this process started it."""
+    global _process
+
+    with _lock:
+        if _process and _process.poll() is None:
+            _process.terminate()
+            try:
+                _process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                _process.kill()
+        _process = None
+
+
+atexit.register(stop)
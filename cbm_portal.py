@@ -1,30 +1,63 @@
 import os
-import time
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.common.exceptions import TimeoutException
 from utils import (
-    get_undetected_driver, safe_navigate_to_url, input_element,
-    click_element_by_js, wait_for_page_load, select_by_text,
-    check_element_exists, get_element_text, handle_pop_up
+    safe_navigate_to_url, input_element,
+    click_element_by_js, wait_for_page_load,
+    check_element_exists, handle_pop_up, login_via_js,
+    save_cookies, load_cookies, BASE_DIR
 )
 from dotenv import load_dotenv
-from mail_sender import send_error_email
+from notifications import fire_error_email
+import driver_pool
 import traceback
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Locators
+_B2B_MENU = (By.XPATH, "(//a[contains(text(), 'B2B')])[1]")
+_USER = (By.XPATH, "//input[@type= 'text']")
+_PASS = (By.XPATH, "//input[@type= 'password']")
+_SUBMIT = (By.XPATH, "//button[contains(text(), 'Se connecter')]")
+_CLOSE_POPUP = (By.XPATH, "//button[contains(text(), 'FERMER')]")
+_INDIVIDUAL_ORDER = (By.XPATH, "//a[contains(text(), 'Traitement de commande individuelle')]")
+_STATION_INPUT = (By.XPATH, "//input[@aria-label= 'Station']")
+_STATION_AIGUILLE = (By.XPATH, "//span[contains(text(), 'Aiguille')]")
+
+# Fills and submits the login form; arguments: username, password
+_LOGIN_JS = """
+var user = document.querySelector("input[type='text']");
+var pass = document.querySelector("input[type='password']");
+var submit = Array.prototype.find.call(document.querySelectorAll('button'), function (b) {
+    return b.textContent.indexOf('Se connecter') !== -1;
+});
+if (!user || !pass || !submit) return 'missing';
+function fill(el, value) {
+    el.focus();
+    el.value = value;
+    el.dispatchEvent(new Event('input', {bubbles: true}));
+    el.dispatchEvent(new Event('change', {bubbles: true}));
+    el.dispatchEvent(new Event('blur'));
+}
+fill(user, arguments[0]);
+fill(pass, arguments[1]);
+submit.click();
+return 'submitted';
+"""
+
 class CBMPortalBot:
     def __init__(self):
         self.driver = None
         self.base_url = "https://bo.jbsurf.com/Admin/BOAngularV2.aspx"
         self.username = os.getenv('CBM_USERNAME')
         self.password = os.getenv('CBM_PASSWORD')
+        self.cookie_file = os.path.join(BASE_DIR, '.cookies.cbm.json')
 
         if not self.username or not self.password:
             raise ValueError("CBM credentials not found in environment variables")
@@ -35,7 +68,7 @@ class CBMPortalBot:
             if self.driver:
                 self.cleanup()
 
-            self.driver = get_undetected_driver(headless=False)
+            self.driver = driver_pool.acquire('cbm')
             if not self.driver:
                 logger.error("Failed to initialize Chrome driver")
                 return False
@@ -50,24 +83,29 @@ class CBMPortalBot:
     def login(self) -> bool:
         """Log in to the CBM portal."""
         try:
-            already_logged_in = check_element_exists(self.driver, (By.XPATH, "(//a[contains(text(), 'B2B')])[1]"))
-            if already_logged_in:
-                logger.info("Already logged in")
-                return True
             safe_navigate_to_url(self.driver, self.base_url)
-            wait_for_page_load(self.driver)
-            time.sleep(5)  # wait for potential redirects
+            self._wait_for_landing()
 
-            # Find and fill the username and password fields
-            input_element(self.driver, (By.XPATH, "//input[@type= 'text']"), self.username)
-            input_element(self.driver, (By.XPATH, "//input[@type= 'password']"), self.password)
-
-            # Click the login button
-            click_element_by_js(self.driver, (By.XPATH, "//button[contains(text(), 'Se connecter')]"))
+            # The persistent profile or saved cookies usually skip the form entirely
+            already_logged_in = check_element_exists(self.driver, _B2B_MENU, timeout=1)
+            if already_logged_in or self._restore_session():
+                logger.info("Already logged in")
+                return True
 
-            # Wait for navigation after login
-            wait_for_page_load(self.driver)
-            handle_pop_up(self.driver, (By.XPATH, "//button[contains(text(), 'FERMER')]"))
+            # Fill the form and submit in a single round trip
+            state = login_via_js(self.driver, _LOGIN_JS, self.username, self.password)
+            if state != 'submitted':
+                logger.warning("Login form not handled by script, falling back to step-by-step login")
+                self._login_step_by_step()
+
+            # The SPA keeps routing after readyState is complete; wait for the real success marker
+            try:
+                WebDriverWait(self.driver, 15, poll_frequency=0.2).until(EC.presence_of_element_located(_B2B_MENU))
+            except TimeoutException:
+                logger.error("Login did not reach the logged-in page")
+                return False
+            handle_pop_up(self.driver, _CLOSE_POPUP)
+            save_cookies(self.driver, self.cookie_file)
 
             logger.info("Login successful")
             return True
@@ -78,18 +116,44 @@ class CBMPortalBot:
             # Send error email
             error_message = f"Error during login: {str(e)}"
             stack_trace = traceback.format_exc()
-            send_error_email(error_message, stack_trace)
+            fire_error_email(error_message, stack_trace)
 
             return False
 
+    def _wait_for_landing(self):
+        """Wait for redirects to land on either the portal or the login form."""
+        try:
+            WebDriverWait(self.driver, 10).until(EC.any_of(
+                EC.presence_of_element_located(_B2B_MENU),
+                EC.presence_of_element_located(_PASS)
+            ))
+        except TimeoutException:
+            logger.warning("Neither portal menu nor login form appeared after navigation")
+
+    def _restore_session(self) -> bool:
+        """Reload the page with cookies saved by an earlier login; True if that logged us in."""
+        if not load_cookies(self.driver, self.cookie_file):
+            return False
+        self.driver.refresh()
+        self._wait_for_landing()
+        return check_element_exists(self.driver, _B2B_MENU, timeout=1)
+
+    def _login_step_by_step(self):
+        """Fill the login form element by element."""
+        input_element(self.driver, _USER, self.username)
+        input_element(self.driver, _PASS, self.password)
+
+        # Click the login button
+        click_element_by_js(self.driver, _SUBMIT)
+
     def process_order(self, order_data: Dict[str, Any]) -> Dict[str, Any]:
         """Main method to process an order."""
         try:
-            click_element_by_js(self.driver, (By.XPATH, "(//a[contains(text(), 'B2B')])[1]"))
-            click_element_by_js(self.driver, (By.XPATH, "//a[contains(text(), 'Traitement de commande individuelle')]"))
+            click_element_by_js(self.driver, _B2B_MENU)
+            click_element_by_js(self.driver, _INDIVIDUAL_ORDER)
             wait_for_page_load(self.driver)
-            input_element(self.driver, (By.XPATH, "//input[@aria-label= 'Station']"), 'Aiguille')
-            click_element_by_js(self.driver, (By.XPATH, "//span[contains(text(), 'Aiguille')]"))
+            input_element(self.driver, _STATION_INPUT, 'Aiguille')
+            click_element_by_js(self.driver, _STATION_AIGUILLE)
 
             return {
                 'success': True,
@@ -103,15 +167,15 @@ class CBMPortalBot:
             # Send error email
             error_message = f"Error processing order: {str(e)}"
             stack_trace = traceback.format_exc()
-            send_error_email(error_message, stack_trace)
+            fire_error_email(error_message, stack_trace)
 
             return {'success': False, 'error': str(e)}
 
-    def cleanup(self):
-        """Clean up resources."""
+    def cleanup(self, healthy: bool = True):
+        """Clean up resources; healthy=False makes the pool replace the driver."""
         try:
             if self.driver:
-                self.driver.quit()
+                driver_pool.release(self.driver, healthy=healthy)
                 self.driver = None
         except Exception as e:
             logger.error(f"Error during cleanup: {e}")
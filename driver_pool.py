@@ -0,0 +1,236 @@
+import os
+import time
+import queue
+import atexit
+import logging
+import threading
+from typing import Dict, Iterable, Optional, Set
+from selenium import webdriver
+from utils import get_undetected_driver, quit_driver
+import browser_supervisor
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", "1"))
+MAX_USES_PER_INSTANCE = int(os.getenv("DRIVER_MAX_USES", "50"))
+ACQUIRE_TIMEOUT = float(os.getenv("DRIVER_ACQUIRE_TIMEOUT", "300"))
+HEADLESS = os.getenv("HEADLESS", "1") == "1"
+
+_pools: Dict[str, queue.Queue] = {}
+# Profile slots in use per site; each live driver owns one so no two share a user-data-dir
+_slots: Dict[str, Set[int]] = {}
+# Per-driver bookkeeping keyed by id(driver): the driver, site, slot, uses and the base window handle
+_meta: Dict[int, Dict] = {}
+_lock = threading.RLock()
+# Notified whenever a driver is returned or a slot is freed, so blocked acquire() calls re-check
+_available = threading.Condition(_lock)
+
+
+def _get_pool(site: str) -> queue.Queue:
+    with _lock:
+        if site not in _pools:
+            _pools[site] = queue.Queue(maxsize=POOL_SIZE)
+            _slots[site] = set()
+        return _pools[site]
+
+
+def _reserve_slot(site: str) -> Optional[int]:
+    """Reserve capacity for a new driver; None if the site pool is already full."""
+    with _lock:
+        for slot in range(POOL_SIZE):
+            if slot not in _slots[site]:
+                _slots[site].add(slot)
+                return slot
+        return None
+
+
+def _free_slot(site: str, slot: int):
+    with _available:
+        _slots[site].discard(slot)
+        _available.notify_all()
+
+
+def _profile_name(site: str, slot: int) -> str:
+    return site if slot == 0 else f"{site}-{slot}"
+
+
+def _create_driver(site: str, slot: int) -> Optional[webdriver.Chrome]:
+    """Launch a new driver for the site, or None if the browser could not start.
+
+    With SHARED_BROWSER=1 the driver attaches to the supervised Chrome over
+    CDP, so every pooled driver works in its own tab of one browser process.
+    """
+    if browser_supervisor.shared_browser_enabled():
+        address = browser_supervisor.ensure_running()
+        if not address:
+            _free_slot(site, slot)
+            return None
+        driver = get_undetected_driver(debugger_address=address)
+    else:
+        driver = get_undetected_driver(headless=HEADLESS, perf_profile="fast",
+                                       profile=_profile_name(site, slot))
+    if not driver:
+        _free_slot(site, slot)
+        return None
+
+    try:
+        # In shared mode this is the dedicated tab get_undetected_driver opened
+        base_handle = driver.current_window_handle
+    except Exception as e:
+        logger.error(f"Driver pool [{site}]: new driver is unresponsive: {e}")
+        _free_slot(site, slot)
+        quit_driver(driver)
+        return None
+
+    _meta[id(driver)] = {'driver': driver, 'site': site, 'slot': slot, 'uses': 0, 'base_handle': base_handle}
+    logger.info(f"Driver pool [{site}]: launched new driver")
+    return driver
+
+
+def _retire(driver: webdriver.Chrome):
+    """Quit a driver and give its slot back to the pool."""
+    meta = _meta.pop(id(driver), None)
+    if meta and browser_supervisor.shared_browser_enabled():
+        # quit() leaves the shared browser running; close the order tab and this driver's own tab too
+        try:
+            if driver.current_window_handle != meta['base_handle']:
+                driver.close()
+            if len(driver.window_handles) > 1:
+                driver.switch_to.window(meta['base_handle'])
+                driver.close()
+        except Exception as e:
+            logger.debug(f"Could not close shared browser tab: {e}")
+    quit_driver(driver)
+    if meta:
+        _free_slot(meta['site'], meta['slot'])
+        logger.info(f"Driver pool [{meta['site']}]: retired driver after {meta['uses']} uses")
+
+
+def _is_alive(driver: webdriver.Chrome) -> bool:
+    try:
+        driver.current_window_handle
+        return True
+    except Exception:
+        return False
+
+
+def warm_up(sites: Iterable[str], count: Optional[int] = None):
+    """Pre-launch drivers so the first orders do not pay browser startup.
+
+    Intended to be called once when the hosting process starts.
+    """
+    for site in sites:
+        pool = _get_pool(site)
+        for _ in range(count or POOL_SIZE):
+            slot = _reserve_slot(site)
+            if slot is None:
+                break
+            driver = _create_driver(site, slot)
+            if driver:
+                pool.put_nowait(driver)
+
+
+def acquire(site: str, timeout: float = ACQUIRE_TIMEOUT) -> Optional[webdriver.Chrome]:
+    """Check out a driver for the site, opened on a fresh tab.
+
+    Reuses an idle driver when one is available, launches a new one while the
+    pool is below POOL_SIZE, and otherwise blocks until a driver is returned or
+    a retired one frees its slot. Returns None if no driver could be obtained.
+    """
+    pool = _get_pool(site)
+    deadline = time.monotonic() + timeout
+
+    while True:
+        driver, slot = None, None
+        with _available:
+            while True:
+                try:
+                    driver = pool.get_nowait()
+                    break
+                except queue.Empty:
+                    pass
+                slot = _reserve_slot(site)
+                if slot is not None:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.error(f"Driver pool [{site}]: no driver available after {timeout} seconds")
+                    return None
+                _available.wait(remaining)
+
+        if driver is None:
+            driver = _create_driver(site, slot)
+            if not driver:
+                return None
+
+        if not _is_alive(driver):
+            logger.warning(f"Driver pool [{site}]: discarding dead driver")
+            _retire(driver)
+            continue
+
+        try:
+            # Isolate each order in its own tab; closed again on release
+            driver.switch_to.new_window('tab')
+        except Exception as e:
+            logger.warning(f"Driver pool [{site}]: could not open a fresh tab: {e}")
+            _retire(driver)
+            continue
+
+        return driver
+
+
+def release(driver: Optional[webdriver.Chrome], healthy: bool = True):
+    """Return a driver to its pool, recycling it if unhealthy or worn out."""
+    if not driver:
+        return
+
+    meta = _meta.get(id(driver))
+    if not meta:
+        # Not a pooled driver
+        _retire(driver)
+        return
+
+    meta['uses'] += 1
+    if not healthy or meta['uses'] >= MAX_USES_PER_INSTANCE:
+        _retire(driver)
+        return
+
+    try:
+        if driver.current_window_handle != meta['base_handle']:
+            driver.close()
+        driver.switch_to.window(meta['base_handle'])
+    except Exception as e:
+        logger.warning(f"Driver pool [{meta['site']}]: failed to reset driver, recycling: {e}")
+        _retire(driver)
+        return
+
+    pool = _get_pool(meta['site'])
+    with _available:
+        try:
+            pool.put_nowait(driver)
+            _available.notify_all()
+            return
+        except queue.Full:
+            pass
+    _retire(driver)
+
+
+def shutdown():
+    """Quit every pooled driver, idle or checked out, and stop the shared browser, if any.
+
+    Registered with atexit so no Chrome outlives the process.
+    """
+    with _lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        while True:
+            try:
+                pool.get_nowait()
+            except queue.Empty:
+                break
+    for meta in list(_meta.values()):
+        _retire(meta['driver'])
+    browser_supervisor.stop()
+
+
+atexit.register(shutdown)
@@ -1,30 +1,41 @@
 import os
 import time
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.common.exceptions import TimeoutException
 from utils import (
-    get_undetected_driver, safe_navigate_to_url, input_element,
-    click_element_by_js, wait_for_page_load, select_by_text,
-    check_element_exists, get_element_text, handle_pop_up
+    safe_navigate_to_url, input_element, click_element_by_js,
+    check_element_exists, handle_pop_up,
+    save_cookies, load_cookies, BASE_DIR
 )
 from dotenv import load_dotenv
-from mail_sender import send_error_email
+from notifications import fire_error_email
+import driver_pool
 import traceback
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Locators
+_LOGGED_IN = (By.XPATH, "//h1[contains(text(), 'EB – AD & Co')]")
+_CONSENT = (By.ID, "tarteaucitronPersonalize2")
+_USER = (By.ID, "mat-input-0")
+_PASS = (By.ID, "password")
+_SUBMIT = (By.XPATH, "//button[contains(text(), 'Connexion')]")
+
 class EARLYBIRDPortalBot:
     def __init__(self):
         self.driver = None
         self.base_url = "https://partenaire.montblancnaturalresort.ski/offre-earlybooking/"
         self.username = os.getenv('EARLYBIRD_USERNAME')
         self.password = os.getenv('EARLYBIRD_PASSWORD')
+        self.cookie_file = os.path.join(BASE_DIR, '.cookies.earlybird.json')
+        # Autocomplete entry for the account; depends on the username, so built once per bot
+        self._user_option = (By.XPATH, f"//span[contains(text(), '{self.username}')]")
 
         if not self.username or not self.password:
             raise ValueError("EARLYBIRD credentials not found in environment variables")
@@ -35,7 +46,7 @@ class EARLYBIRDPortalBot:
             if self.driver:
                 self.cleanup()
 
-            self.driver = get_undetected_driver(headless=False)
+            self.driver = driver_pool.acquire('earlybird')
             if not self.driver:
                 logger.error("Failed to initialize Chrome driver")
                 return False
@@ -51,23 +62,30 @@ class EARLYBIRDPortalBot:
         """Log in to the CBM portal."""
         try:
             safe_navigate_to_url(self.driver, self.base_url)
-            wait_for_page_load(self.driver)
-            time.sleep(5)  # wait for potential redirects
-            already_logged_in = check_element_exists(self.driver, (By.XPATH, "//h1[contains(text(), 'EB – AD & Co')]"))
-            if already_logged_in:
+            self._wait_for_landing()
+
+            # The persistent profile or saved cookies usually skip the form entirely
+            already_logged_in = check_element_exists(self.driver, _LOGGED_IN, timeout=1)
+            if already_logged_in or self._restore_session():
                 logger.info("Already logged in")
                 return True
+
             # Find and fill the username and password fields
-            handle_pop_up(self.driver, (By.ID, "tarteaucitronPersonalize2"))
-            input_element(self.driver, (By.ID, "mat-input-0"), self.username)
-            click_element_by_js(self.driver, (By.XPATH, f"//span[contains(text(), '{self.username}')]"))
-            input_element(self.driver, (By.ID, "password"), self.password)
+            handle_pop_up(self.driver, _CONSENT)
+            input_element(self.driver, _USER, self.username)
+            click_element_by_js(self.driver, self._user_option)
+            input_element(self.driver, _PASS, self.password)
 
             # Click the login button
-            click_element_by_js(self.driver, (By.XPATH, "//button[contains(text(), 'Connexion')]"))
+            click_element_by_js(self.driver, _SUBMIT)
 
-            # Wait for navigation after login
-            wait_for_page_load(self.driver)
+            # The SPA keeps routing after readyState is complete; wait for the real success marker
+            try:
+                WebDriverWait(self.driver, 15, poll_frequency=0.2).until(EC.presence_of_element_located(_LOGGED_IN))
+            except TimeoutException:
+                logger.error("Login did not reach the logged-in page")
+                return False
+            save_cookies(self.driver, self.cookie_file)
 
             logger.info("Login successful")
             return True
@@ -78,10 +96,28 @@ class EARLYBIRDPortalBot:
             # Send error email
             error_message = f"Error during login: {str(e)}"
             stack_trace = traceback.format_exc()
-            send_error_email(error_message, stack_trace)
+            fire_error_email(error_message, stack_trace)
 
             return False
 
+    def _wait_for_landing(self):
+        """Wait for redirects to land on either the dashboard or the login form."""
+        try:
+            WebDriverWait(self.driver, 10).until(EC.any_of(
+                EC.presence_of_element_located(_LOGGED_IN),
+                EC.presence_of_element_located(_USER)
+            ))
+        except TimeoutException:
+            logger.warning("Neither dashboard nor login form appeared after navigation")
+
+    def _restore_session(self) -> bool:
+        """Reload the page with cookies saved by an earlier login; True if that logged us in."""
+        if not load_cookies(self.driver, self.cookie_file):
+            return False
+        self.driver.refresh()
+        self._wait_for_landing()
+        return check_element_exists(self.driver, _LOGGED_IN, timeout=1)
+
     def process_order(self, order_data: Dict[str, Any]) -> Dict[str, Any]:
         """Main method to process an order."""
         try:
@@ -90,7 +126,8 @@ class EARLYBIRDPortalBot:
             logger.info(f"Mock processing order: {order_data.get('order_id')}")
 
             # Simulate processing time
-            time.sleep(2)
+            if os.getenv('MOCK_MODE', '0') == '1':
+                time.sleep(2)
 
             return {
                 'success': True,
@@ -104,15 +141,15 @@ class EARLYBIRDPortalBot:
             # Send error email
             error_message = f"Error processing order: {str(e)}"
             stack_trace = traceback.format_exc()
-            send_error_email(error_message, stack_trace)
+            fire_error_email(error_message, stack_trace)
 
             return {'success': False, 'error': str(e)}
 
-    def cleanup(self):
-        """Clean up resources."""
+    def cleanup(self, healthy: bool = True):
+        """Clean up resources; healthy=False makes the pool replace the driver."""
         try:
             if self.driver:
-                self.driver.quit()
+                driver_pool.release(self.driver, healthy=healthy)
                 self.driver = None
         except Exception as e:
             logger.error(f"Error during cleanup: {e}")
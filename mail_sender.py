@@ -1,5 +1,6 @@
+import atexit
 import smtplib
-import traceback
+import threading
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
@@ -8,10 +9,75 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# HTML skeleton; only the timestamp, message and trace are filled in per email
+_BODY_TEMPLATE = """
+    <html>
+    <body>
+        <h2 style='color: red;'>Automation Error Notification</h2>
+        <p><strong>Timestamp:</strong> {timestamp}</p>
+        <p><strong>Error Message:</strong></p>
+        <pre>{error_message}</pre>
+        <p><strong>Stack Trace:</strong></p>
+        <pre>{stack_trace}</pre>
+    </body>
+    </html>
+    """
+
+# One authenticated SMTP connection shared by all error emails
+_smtp_lock = threading.Lock()
+_smtp = None
+
+
+def _close_smtp():
+    global _smtp
+    if _smtp is not None:
+        try:
+            _smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+    _smtp = None
+
+
+def _get_smtp(smtp_host, smtp_port, api_key):
+    """Return the cached SMTP connection, reconnecting if it no longer answers NOOP.
+
+    Must be called with _smtp_lock held.
+    """
+    global _smtp
+    if _smtp is not None:
+        try:
+            if _smtp.noop()[0] == 250:
+                return _smtp
+        except (smtplib.SMTPException, OSError):
+            pass
+        _close_smtp()
+
+    server = smtplib.SMTP(smtp_host, smtp_port, timeout=30)
+    try:
+        server.starttls()
+        server.login(api_key, api_key)  # Postmark uses the API key as both username and password
+    except Exception:
+        server.close()
+        raise
+    _smtp = server
+    return _smtp
+
+
+def _shutdown():
+    with _smtp_lock:
+        _close_smtp()
+
+
+atexit.register(_shutdown)
+
+
 def send_error_email(error_message, stack_trace):
     """
     Sends an error email with the provided error details using Postmark SMTP.
 
+    The SMTP connection is kept open and reused across calls, and reopened
+    if the server has dropped it.
+
     Args:
         error_message (str): The error message to include in the email.
         stack_trace (str): The stack trace to include in the email.
@@ -28,18 +94,7 @@ def send_error_email(error_message, stack_trace):
     subject = "Automation Error Notification"
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    body = f"""
-    <html>
-    <body>
-        <h2 style='color: red;'>Automation Error Notification</h2>
-        <p><strong>Timestamp:</strong> {timestamp}</p>
-        <p><strong>Error Message:</strong></p>
-        <pre>{error_message}</pre>
-        <p><strong>Stack Trace:</strong></p>
-        <pre>{stack_trace}</pre>
-    </body>
-    </html>
-    """
+    body = _BODY_TEMPLATE.format(timestamp=timestamp, error_message=error_message, stack_trace=stack_trace)
 
     # Create the email message
     msg = MIMEMultipart()
@@ -52,11 +107,13 @@ def send_error_email(error_message, stack_trace):
     msg.attach(MIMEText(body, 'html'))
 
     try:
-        # Connect to the Postmark SMTP server and send the email
-        with smtplib.SMTP(smtp_host, smtp_port) as server:
-            server.starttls()
-            server.login(api_key, api_key)  # Postmark uses the API key as both username and password
-            server.sendmail(smtp_from, smtp_to, msg.as_string())
+        with _smtp_lock:
+            try:
+                _get_smtp(smtp_host, smtp_port, api_key).sendmail(smtp_from, smtp_to, msg.as_string())
+            except smtplib.SMTPServerDisconnected:
+                # Dropped between the NOOP check and the send; reconnect once
+                _close_smtp()
+                _get_smtp(smtp_host, smtp_port, api_key).sendmail(smtp_from, smtp_to, msg.as_string())
         print("Error email sent successfully.")
     except Exception as e:
         print(f"Failed to send error email: {e}")
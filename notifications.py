@@ -1,14 +1,59 @@
 import os
+import json
 import logging
 import requests
+from concurrent.futures import Future, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Optional
 from datetime import datetime
 from dotenv import load_dotenv
+from mail_sender import send_error_email
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Shared session so repeated alerts reuse a keep-alive connection to Slack
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8,
+                                       max_retries=Retry(total=2, backoff_factor=0.3)))
+
+# Slack payload serialized once; only the alert text and timestamp change per call
+_ALERT_PLACEHOLDER = '"__ALERT__"'
+_TIMESTAMP_PLACEHOLDER = '"__TIMESTAMP__"'
+_SLACK_PAYLOAD_TEMPLATE = json.dumps({
+    'text': "🎿 Chamonix Ski Pass Automation Alert",
+    'attachments': [
+        {
+            'color': 'danger',
+            'fields': [
+                {
+                    'title': 'Alert',
+                    'value': '__ALERT__',
+                    'short': False
+                },
+                {
+                    'title': 'Timestamp',
+                    'value': '__TIMESTAMP__',
+                    'short': True
+                }
+            ]
+        }
+    ]
+})
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+
+# Notifications are sent from here so callers (bot retries, order flow) never wait on Slack/SMTP
+_NOTIFY_EXEC = ThreadPoolExecutor(max_workers=2, thread_name_prefix="notify")
+
+def _render_slack_payload(message: str) -> bytes:
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    # Timestamp first: the alert text is user data and may contain the other placeholder
+    payload = _SLACK_PAYLOAD_TEMPLATE.replace(_TIMESTAMP_PLACEHOLDER, json.dumps(timestamp), 1)
+    payload = payload.replace(_ALERT_PLACEHOLDER, json.dumps(message), 1)
+    return payload.encode('utf-8')
+
 def send_slack_alert(message: str, webhook_url: Optional[str] = None) -> bool:
     """Send alert to Slack channel."""
     try:
@@ -19,28 +64,8 @@ def send_slack_alert(message: str, webhook_url: Optional[str] = None) -> bool:
             logger.warning("Slack webhook URL not configured")
             return False
 
-        payload = {
-            'text': f"🎿 Chamonix Ski Pass Automation Alert",
-            'attachments': [
-                {
-                    'color': 'danger',
-                    'fields': [
-                        {
-                            'title': 'Alert',
-                            'value': message,
-                            'short': False
-                        },
-                        {
-                            'title': 'Timestamp',
-                            'value': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                            'short': True
-                        }
-                    ]
-                }
-            ]
-        }
-
-        response = requests.post(webhook_url, json=payload, timeout=10)
+        response = _SESSION.post(webhook_url, data=_render_slack_payload(message),
+                                 headers=_JSON_HEADERS, timeout=(3, 10))
 
         if response.status_code == 200:
             logger.info(f"Slack alert sent successfully: {message}")
@@ -87,3 +112,20 @@ def send_order_completion_notification(order_id: int, voucher_path: str) -> bool
     except Exception as e:
         logger.error(f"Error sending completion notification: {e}")
         return False
+
+def _log_failure(future: Future):
+    error = future.exception()
+    if error:
+        logger.error(f"Background notification failed: {error}")
+
+def fire_slack(message: str, webhook_url: Optional[str] = None) -> Future:
+    """Queue a Slack alert without waiting for it to be sent."""
+    future = _NOTIFY_EXEC.submit(send_slack_alert, message, webhook_url)
+    future.add_done_callback(_log_failure)
+    return future
+
+def fire_error_email(error_message: str, stack_trace: str) -> Future:
+    """Queue an error email without waiting for the SMTP exchange."""
+    future = _NOTIFY_EXEC.submit(send_error_email, error_message, stack_trace)
+    future.add_done_callback(_log_failure)
+    return future
@@ -1,11 +1,23 @@
+import os
+import time
+import asyncio
 import logging
-from typing import Any, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
 
-from mail_sender import send_error_email
+from notifications import fire_error_email
 import traceback
 
 logger = logging.getLogger("process_runner")
 
+# Selenium runs block, so async callers hand them to this pool. Sized like the
+# driver pool by default so each worker can hold one browser.
+MAX_CONCURRENT_ORDERS = int(os.getenv("MAX_CONCURRENT_ORDERS", os.getenv("DRIVER_POOL_SIZE", "1")))
+EXECUTOR = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_ORDERS, thread_name_prefix="order")
+
+MAX_ATTEMPTS = int(os.getenv("ORDER_MAX_ATTEMPTS", "2"))
+RETRY_DELAY = float(os.getenv("ORDER_RETRY_DELAY", "5"))
+
 
 def _get_bot_class_for_site(site: Optional[str]):
     """Lazy-resolve the bot class for a given site key.
@@ -38,7 +50,89 @@ def _get_bot_class_for_site(site: Optional[str]):
     return None, f"unsupported_site:{key}"
 
 
-def process_order_runner(order_data: Dict[str, Any]) -> Optional[str]:
+def _drive_bot(bot, order_data: Dict[str, Any], order_id) -> Tuple[Optional[str], bool]:
+    """Run initialize_driver(), login() and process_order() on a bot.
+
+    Returns (voucher_path, retry): retry is True when the failure looks
+    transient (driver, login or portal error) and another attempt may succeed.
+    """
+    # initialize driver
+    init_ok = getattr(bot, "initialize_driver", lambda: True)()
+    if not init_ok:
+        logger.error("Order %s: driver initialization failed", order_id)
+        return None, True
+
+    # login
+    login_ok = getattr(bot, "login", lambda: True)()
+    if not login_ok:
+        logger.error("Order %s: login failed", order_id)
+        return None, True
+
+    # process order
+    result = getattr(bot, "process_order")(order_data)
+
+    # If result is a dict and contains voucher_path, return it
+    if isinstance(result, dict):
+        if result.get("success") and result.get("voucher_path"):
+            return result.get("voucher_path"), False
+        # success but no voucher yet
+        if result.get("success"):
+            return None, False
+        # failure
+        logger.error("Order %s: processing failed: %s", order_id, result.get("error"))
+        return None, True
+
+    # If the bot returned a string (path), return it directly
+    if isinstance(result, str):
+        return result, False
+
+    # Unknown result type
+    logger.warning("Order %s: unexpected result type from process_order: %r", order_id, type(result))
+    return None, False
+
+
+def _run_attempt(bot_class, order_data: Dict[str, Any], order_id, attempt: int,
+                 last_attempt: bool) -> Tuple[Optional[str], bool]:
+    """Run one bot pass over the order; returns (voucher_path, retry) like _drive_bot.
+
+    Unexpected exceptions are retried, and only reported by email once the
+    last attempt fails. After a retryable failure the bot's driver is
+    released as unhealthy, so the next attempt gets a new browser.
+    """
+    try:
+        bot = bot_class()
+    except Exception as e:
+        # Missing credentials and other configuration errors; another attempt would fail the same way
+        logger.exception("Order %s: could not create bot: %s", order_id, e)
+
+        # Send error email
+        error_message = f"Could not create bot for order {order_id}: {str(e)}"
+        stack_trace = traceback.format_exc()
+        fire_error_email(error_message, stack_trace)
+
+        return None, False
+
+    retry = True
+    try:
+        voucher_path, retry = _drive_bot(bot, order_data, order_id)
+        return voucher_path, retry
+
+    except Exception as e:
+        logger.exception("Order %s: unexpected error on attempt %d: %s", order_id, attempt, e)
+
+        if last_attempt:
+            # Send error email
+            error_message = f"Unexpected error occurred for order {order_id} (attempt {attempt}): {str(e)}"
+            stack_trace = traceback.format_exc()
+            fire_error_email(error_message, stack_trace)
+
+        return None, True
+
+    finally:
+        getattr(bot, "cleanup", lambda healthy=True: None)(healthy=not retry)
+
+
+def process_order_runner(order_data: Dict[str, Any], max_attempts: int = MAX_ATTEMPTS) -> Optional[str]:
     """Process an order end-to-end and return a voucher file path (or None on failure).
 
     Flow:
@@ -46,6 +140,7 @@ def process_order_runner(order_data: Dict[str, Any]) -> Optional[str]:
     - Lazy-import and instantiate the appropriate bot class
     - initialize_driver(), login(), process_order(order_data)
     - cleanup() always called
+    - transient failures are retried up to max_attempts times with a fresh bot
 
     Returns:
     - voucher path string on success (if bot returns it), otherwise None.
@@ -58,57 +153,29 @@ def process_order_runner(order_data: Dict[str, Any]) -> Optional[str]:
         logger.error("Order %s: bot selection failed: %s", order_id, err)
         return None
 
-    bot = None
-    try:
-        bot = bot_class()
+    for attempt in range(1, max_attempts + 1):
+        voucher_path, retry = _run_attempt(bot_class, order_data, order_id, attempt, attempt == max_attempts)
+        if voucher_path or not retry:
+            return voucher_path
 
-        # initialize driver
-        init_ok = getattr(bot, "initialize_driver", lambda: True)()
-        if not init_ok:
-            logger.error("Order %s: driver initialization failed", order_id)
-            return None
-
-        # login
-        login_ok = getattr(bot, "login", lambda: True)()
-        if not login_ok:
-            logger.error("Order %s: login failed", order_id)
-            return None
-
-        # process order
-        result = getattr(bot, "process_order")(order_data)
-
-        # If result is a dict and contains voucher_path, return it
-        if isinstance(result, dict):
-            if result.get("success") and result.get("voucher_path"):
-                return result.get("voucher_path")
-            # success but no voucher yet
-            if result.get("success"):
-                return None
-            # failure
-            logger.error("Order %s: processing failed: %s", order_id, result.get("error"))
-            return None
-
-        # If the bot returned a string (path), return it directly
-        if isinstance(result, str):
-            return result
-
-        # Unknown result type
-        logger.warning("Order %s: unexpected result type from process_order: %r", order_id, type(result))
-        return None
+        if attempt < max_attempts:
+            logger.warning("Order %s: attempt %d/%d failed, retrying in %ss",
+                           order_id, attempt, max_attempts, RETRY_DELAY)
+            time.sleep(RETRY_DELAY)
 
-    except Exception as e:
-        logger.exception("Order %s: unexpected error: %s", order_id, e)
+    logger.error("Order %s: giving up after %d attempts", order_id, max_attempts)
+    return None
 
-        # Send error email
-        error_message = f"Unexpected error occurred for order {order_id}: {str(e)}"
-        stack_trace = traceback.format_exc()
-        send_error_email(error_message, stack_trace)
 
-        return None
+async def process_order_async(order_data: Dict[str, Any]) -> Optional[str]:
+    """Run process_order_runner on EXECUTOR without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(EXECUTOR, process_order_runner, order_data)
 
-    finally:
-        if bot:
-            getattr(bot, "cleanup", lambda: None)()
+
+def shutdown_executor(wait: bool = True):
+    """Stop accepting orders and, optionally, wait for running ones to finish."""
+    EXECUTOR.shutdown(wait=wait)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,152 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+import browser_supervisor
+import driver_pool
+
+
+class FakeBrowser:
+    """One shared Chrome: an ordered list of open tab handles."""
+
+    def __init__(self):
+        self.tabs = ['other']  # a tab that belongs to nobody in the pool
+        self._next = 0
+
+    def open_tab(self):
+        self._next += 1
+        handle = f"tab-{self._next}"
+        self.tabs.append(handle)
+        return handle
+
+
+class FakeSwitchTo:
+    def __init__(self, driver):
+        self._driver = driver
+
+    def new_window(self, kind):
+        self._driver.current = self._driver.browser.open_tab()
+
+    def window(self, handle):
+        if handle not in self._driver.browser.tabs:
+            raise RuntimeError(f"no such window: {handle}")
+        self._driver.current = handle
+
+
+class FakeDriver:
+    """Attached driver; like get_undetected_driver, it starts on a tab of its own."""
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.current = browser.open_tab()
+        self.switch_to = FakeSwitchTo(self)
+        self.quit_called = False
+
+    @property
+    def current_window_handle(self):
+        if self.quit_called or self.current not in self.browser.tabs:
+            raise RuntimeError("no such window")
+        return self.current
+
+    @property
+    def window_handles(self):
+        return list(self.browser.tabs)
+
+    def close(self):
+        self.browser.tabs.remove(self.current)
+        self.current = None
+
+
+class SharedBrowserPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.browser = FakeBrowser()
+        self.created = []
+
+        def fake_driver(**kwargs):
+            driver = FakeDriver(self.browser)
+            self.created.append(driver)
+            return driver
+
+        patches = [
+            mock.patch.object(driver_pool, 'POOL_SIZE', 1),
+            mock.patch.object(driver_pool, '_pools', {}),
+            mock.patch.object(driver_pool, '_slots', {}),
+            mock.patch.object(driver_pool, '_meta', {}),
+            mock.patch.object(driver_pool, 'get_undetected_driver', fake_driver),
+            mock.patch.object(driver_pool, 'quit_driver', lambda d: setattr(d, 'quit_called', True)),
+            mock.patch.object(browser_supervisor, 'shared_browser_enabled', lambda: True),
+            mock.patch.object(browser_supervisor, 'ensure_running', lambda: '127.0.0.1:9222'),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_healthy_release_keeps_only_base_tab(self):
+        driver = driver_pool.acquire('cbm', timeout=1)
+        self.assertEqual(len(self.browser.tabs), 3)
+
+        driver_pool.release(driver)
+
+        self.assertEqual(self.browser.tabs, ['other', 'tab-1'])
+        self.assertFalse(driver.quit_called)
+
+    def test_unhealthy_release_closes_order_and_base_tabs(self):
+        driver = driver_pool.acquire('cbm', timeout=1)
+
+        driver_pool.release(driver, healthy=False)
+
+        self.assertEqual(self.browser.tabs, ['other'])
+        self.assertTrue(driver.quit_called)
+
+    def test_max_uses_retirement_leaves_no_tabs(self):
+        with mock.patch.object(driver_pool, 'MAX_USES_PER_INSTANCE', 1):
+            driver = driver_pool.acquire('cbm', timeout=1)
+            driver_pool.release(driver)
+
+        self.assertEqual(self.browser.tabs, ['other'])
+
+    def test_waiter_gets_new_driver_when_holder_is_retired(self):
+        holder = driver_pool.acquire('cbm', timeout=1)
+        result = {}
+
+        def wait_for_driver():
+            started = time.monotonic()
+            result['driver'] = driver_pool.acquire('cbm', timeout=5)
+            result['elapsed'] = time.monotonic() - started
+
+        waiter = threading.Thread(target=wait_for_driver)
+        waiter.start()
+        time.sleep(0.2)
+        self.assertTrue(waiter.is_alive())
+
+        driver_pool.release(holder, healthy=False)
+        waiter.join(timeout=5)
+
+        self.assertFalse(waiter.is_alive())
+        self.assertIsNotNone(result['driver'])
+        self.assertIsNot(result['driver'], holder)
+        self.assertLess(result['elapsed'], 2)
+
+    def test_waiter_gets_released_driver(self):
+        holder = driver_pool.acquire('cbm', timeout=1)
+        result = {}
+
+        waiter = threading.Thread(target=lambda: result.update(driver=driver_pool.acquire('cbm', timeout=5)))
+        waiter.start()
+        time.sleep(0.2)
+
+        driver_pool.release(holder)
+        waiter.join(timeout=5)
+
+        self.assertIs(result['driver'], holder)
+        self.assertEqual(len(self.created), 1)
+
+    def test_acquire_times_out_when_pool_stays_full(self):
+        driver_pool.acquire('cbm', timeout=1)
+
+        self.assertIsNone(driver_pool.acquire('cbm', timeout=0.2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,11 @@
 from selenium import webdriver
+import gc
 import time
 import os
+import json
 import logging
-from typing import Optional, Union, Tuple
+import psutil
+from typing import Optional
 from selenium.webdriver import ActionChains
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.support import expected_conditions as EC
@@ -16,6 +19,9 @@ from selenium.common.exceptions import (
 )
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROFILES_DIR = os.getenv("CHROME_PROFILES_DIR", os.path.join(BASE_DIR, "chrome-dir"))
+# Connections kept per host by the WebDriver HTTP client
+COMMAND_POOL_MAXSIZE = int(os.getenv("WEBDRIVER_POOL_MAXSIZE", "20"))
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -158,58 +164,145 @@ def get_element_text(driver, by_locator, timeout: int = 40, default: str = "") -
         return default
 
 
-def get_undetected_driver(headless: bool = False, max_retries: int = 3) -> Optional[webdriver.Chrome]:
-    """Create undetected Chrome driver with comprehensive error handling."""
+def _add_launch_options(options: webdriver.ChromeOptions, headless: bool, perf_profile: Optional[str] = None,
+                        profile: Optional[str] = None):
+    """Add the flags used when this process launches its own Chrome."""
+    path = os.path.join(PROFILES_DIR, profile) if profile else PROFILES_DIR
+
+    # Ensure chrome-dir exists
+    if not os.path.exists(path):
+        try:
+            os.makedirs(path, exist_ok=True)
+            logger.info(f"Created chrome directory: {path}")
+        except OSError as e:
+            logger.error(f"Failed to create chrome directory: {e}")
+            path = None
+
+    if path:
+        options.add_argument(f'--user-data-dir={path}')
+        options.add_argument('--profile-directory=Default')
+
+    # Enhanced options for stability
+    options.add_argument("--log-level=3")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-plugins")
+    options.add_argument("--disable-images")
+    options.add_argument("--disable-javascript")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-background-timer-throttling")
+    options.add_argument("--disable-backgrounding-occluded-windows")
+    options.add_argument("--disable-renderer-backgrounding")
+    options.add_argument("--disable-features=TranslateUI")
+    options.add_argument("--disable-ipc-flooding-protection")
+
+    if headless:
+        options.add_argument("--headless=new")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--window-size=1920,1080")
+    else:
+        options.add_argument("--start-maximized")
+
+    if perf_profile == "fast":
+        # Skip images and notification prompts; the order flow only needs the DOM
+        if not headless:
+            options.add_argument("--disable-gpu")
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        })
+
+    # Experimental options for better stability
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+
+
+def _widen_command_pool(driver, maxsize: int = COMMAND_POOL_MAXSIZE):
+    """Rebuild the driver's urllib3 pool manager with a larger maxsize.
+
+    webdriver.Chrome does not take a ClientConfig in this Selenium version, so
+    the pool size is set on the executor's ClientConfig after creation.
+    """
+    executor = driver.command_executor
+    try:
+        executor._client_config.init_args_for_pool_manager = {
+            "init_args_for_pool_manager": {"maxsize": maxsize}
+        }
+        old_conn = getattr(executor, "_conn", None)
+        if old_conn is not None:
+            executor._conn = executor._get_connection_manager()
+            old_conn.clear()
+    except Exception as e:
+        logger.warning(f"Could not resize WebDriver connection pool: {e}")
+
+
+def quit_driver(driver, timeout: int = 5):
+    """Quit the driver and kill any chromedriver/Chrome processes it leaves behind."""
+    pid = getattr(driver, '_chromedriver_pid', None)
+    processes = []
+    if pid:
+        try:
+            parent = psutil.Process(pid)
+            # Collect children first; they are reparented once chromedriver exits
+            processes = parent.children(recursive=True) + [parent]
+        except psutil.Error:
+            pass
+
+    try:
+        driver.quit()
+    except Exception as e:
+        logger.error(f"Error quitting driver: {e}")
+
+    for process in processes:
+        try:
+            process.kill()
+        except psutil.NoSuchProcess:
+            pass
+        except psutil.Error as e:
+            logger.warning(f"Could not kill process {process.pid}: {e}")
+    psutil.wait_procs(processes, timeout=timeout)
+
+    # Release Selenium object graphs held by the quit driver
+    gc.collect()
+
+
+def get_undetected_driver(headless: bool = False, max_retries: int = 3,
+                          debugger_address: Optional[str] = None,
+                          perf_profile: Optional[str] = None,
+                          profile: Optional[str] = None) -> Optional[webdriver.Chrome]:
+    """Create undetected Chrome driver with comprehensive error handling.
+
+    If debugger_address is given, attach to that already-running Chrome
+    instead of launching a new browser; the returned driver is switched to a
+    new tab it owns. perf_profile="fast" disables images, notifications and
+    GPU compositing. profile selects a persistent user data directory under
+    PROFILES_DIR so logins survive browser restarts.
+    """
     for attempt in range(max_retries):
         driver = None
         try:
             options = webdriver.ChromeOptions()
-            path = rf'{BASE_DIR}\chrome-dir'
-
-            # Ensure chrome-dir exists
-            if not os.path.exists(path):
-                try:
-                    os.makedirs(path, exist_ok=True)
-                    logger.info(f"Created chrome directory: {path}")
-                except OSError as e:
-                    logger.error(f"Failed to create chrome directory: {e}")
-                    path = None
-
-            if path:
-                options.add_argument(f'--user-data-dir={path}')
-
-            # Enhanced options for stability
-            options.add_argument("--log-level=3")
-            options.add_argument("--no-sandbox")
-            options.add_argument("--disable-blink-features=AutomationControlled")
-            options.add_argument("--disable-extensions")
-            options.add_argument("--disable-plugins")
-            options.add_argument("--disable-images")
-            options.add_argument("--disable-javascript")
-            options.add_argument("--disable-dev-shm-usage")
-            options.add_argument("--disable-background-timer-throttling")
-            options.add_argument("--disable-backgrounding-occluded-windows")
-            options.add_argument("--disable-renderer-backgrounding")
-            options.add_argument("--disable-features=TranslateUI")
-            options.add_argument("--disable-ipc-flooding-protection")
-
-            if headless:
-                options.add_argument("--headless")
-                options.add_argument("--disable-gpu")
-                options.add_argument("--window-size=1920,1080")
-            else:
-                options.add_argument("--start-maximized")
 
-            # Experimental options for better stability
-            options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            options.add_experimental_option('useAutomationExtension', False)
+            if debugger_address:
+                # Launch flags belong to the shared browser; only attach here
+                options.add_experimental_option("debuggerAddress", debugger_address)
+            else:
+                _add_launch_options(options, headless, perf_profile, profile)
 
             # Initialize Chrome driver
             service = Service(ChromeDriverManager().install())
             driver = webdriver.Chrome(service=service, options=options)
+            _widen_command_pool(driver)
+            driver._chromedriver_pid = getattr(service.process, 'pid', None)
 
-            # Allow the browser to fully initialize
-            time.sleep(3)
+            if debugger_address:
+                # The attached tab may belong to another order; work in a tab of our own
+                driver.switch_to.new_window('tab')
+            else:
+                # Allow the browser to fully initialize
+                time.sleep(3)
 
             # Enhanced fingerprinting protection
             stealth_js = """
@@ -228,10 +321,7 @@ def get_undetected_driver(headless: bool = False, max_retries: int = 3) -> Optio
         except Exception as e:
             logger.error(f"Driver creation attempt {attempt + 1} failed: {e}")
             if driver:
-                try:
-                    driver.quit()
-                except:
-                    pass
+                quit_driver(driver)
 
             if attempt < max_retries - 1:
                 logger.info(f"Retrying driver creation... Attempts left: {max_retries - attempt - 1}")
@@ -243,6 +333,65 @@ def get_undetected_driver(headless: bool = False, max_retries: int = 3) -> Optio
     return None
 
 
+def login_via_js(driver, script: str, *args, default=None):
+    """Run a whole login step as one execute_script call.
+
+    Folds several element lookups/fills/clicks into a single WebDriver round
+    trip. Returns the script result, or default if the script fails.
+    """
+    try:
+        return driver.execute_script(script, *args)
+    except WebDriverException as e:
+        logger.error(f"Login script failed: {e}")
+        return default
+    except Exception as e:
+        logger.error(f"Unexpected error in login_via_js: {e}")
+        return default
+
+
+def save_cookies(driver, path: str) -> bool:
+    """Persist the current session cookies to a JSON file."""
+    try:
+        cookies = driver.get_cookies()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(cookies, f)
+        return True
+    except (OSError, WebDriverException) as e:
+        logger.error(f"Failed to save cookies to {path}: {e}")
+        return False
+
+
+def load_cookies(driver, path: str) -> bool:
+    """Add unexpired cookies saved by save_cookies to the current domain.
+
+    Returns True if at least one cookie was restored.
+    """
+    if not os.path.exists(path):
+        return False
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cookies = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to read cookies from {path}: {e}")
+        return False
+
+    restored = 0
+    now = time.time()
+    for cookie in cookies:
+        if 'expiry' in cookie:
+            if cookie['expiry'] < now:
+                continue
+            cookie['expiry'] = int(cookie['expiry'])
+        try:
+            driver.add_cookie(cookie)
+            restored += 1
+        except WebDriverException as e:
+            logger.debug(f"Skipping cookie {cookie.get('name')}: {e}")
+
+    return restored > 0
+
+
 def check_element_exists(driver, by_locator, timeout: int = 3) -> bool:
     """Check if element exists with proper exception handling."""
     try: